@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for the SaaS Monitoring Platform web app.
+
+Runs the Flask app on gevent workers: gunicorn monkey-patches the standard
+library before the app is imported, so requests waiting on Elasticsearch,
+MongoDB or Redis yield to other requests instead of blocking the worker.
+
+Usage:
+    gunicorn --config gunicorn.conf.py app:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# gevent worker with WebSocket support for Flask-SocketIO
+worker_class = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+# Socket.IO long-polling needs sticky sessions to run more than one worker
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# With gevent workers this is a heartbeat: a worker is restarted only if it
+# stops responding, not when a request (such as a long export) runs longer
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Read by app.py when it creates the SocketIO server
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+
+
+def post_worker_init(worker):
+    """Start the live log stream in each worker, as ``python app.py`` does."""
+    from app import start_streaming_thread
+    start_streaming_thread()
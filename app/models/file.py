@@ -1,10 +1,34 @@
 """
 File model for managing uploaded files in MongoDB
 """
+import logging
 from datetime import datetime
+from functools import lru_cache
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DeleteOne
+from pymongo.errors import BulkWriteError
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def _as_oid(file_id: str) -> ObjectId:
+    """
+    Convert a file ID string to an ObjectId, reusing recent conversions
+    
+    ObjectIds are immutable, so the same instance can be shared across
+    lookups of a file; invalid IDs still raise InvalidId and are not cached.
+    
+    Args:
+        file_id: MongoDB ObjectId as string
+    
+    Returns:
+        ObjectId: Parsed ID
+    """
+    return ObjectId(file_id)
+
 
 class File:
     """Model for file metadata stored in MongoDB"""
@@ -19,6 +43,7 @@ class File:
         self.client = mongo_client
         self.db = mongo_client['saas_monitoring']
         self.collection = self.db['files']
+        # Indexes are created once at startup by init_mongodb
     
     def create(
         self,
@@ -91,12 +116,12 @@ class File:
             Dict: File document or None if not found
         """
         try:
-            file = self.collection.find_one({'_id': ObjectId(file_id)})
+            file = self.collection.find_one({'_id': _as_oid(file_id)})
             if file:
                 file['_id'] = str(file['_id'])
             return file
         except Exception as e:
-            print(f"Error fetching file {file_id}: {str(e)}")
+            logger.error("Error fetching file %s: %s", file_id, e)
             return None
     
     def delete(self, file_id: str) -> bool:
@@ -110,25 +135,110 @@ class File:
             bool: True if deleted, False otherwise
         """
         try:
-            result = self.collection.delete_one({'_id': ObjectId(file_id)})
+            result = self.collection.delete_one({'_id': _as_oid(file_id)})
             return result.deleted_count > 0
         except Exception as e:
-            print(f"Error deleting file {file_id}: {str(e)}")
+            logger.error("Error deleting file %s: %s", file_id, e)
             return False
     
+    def pop(self, file_id: str) -> Optional[Dict]:
+        """
+        Delete a file document and return it, in a single round-trip
+        
+        Args:
+            file_id: MongoDB ObjectId as string
+        
+        Returns:
+            Dict: Deleted document (filename and saved_as only), or None if
+            the ID is invalid or no such file exists
+        """
+        try:
+            object_id = _as_oid(file_id)
+        except (InvalidId, TypeError):
+            return None
+        
+        file = self.collection.find_one_and_delete(
+            {'_id': object_id},
+            projection={'filename': 1, 'saved_as': 1}
+        )
+        if file:
+            file['_id'] = str(file['_id'])
+        return file
+    
+    def pop_many(self, file_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Delete several file documents and return them
+        
+        Each ID is parsed once; the documents are read with one ``$in``
+        query and removed with one unordered bulk write, so the batch costs
+        two round-trips however many files it holds, and one failed delete
+        does not stop the rest.
+        
+        Args:
+            file_ids: MongoDB ObjectIds as strings
+        
+        Returns:
+            Dict[str, Dict]: Each given ID whose document was deleted, mapped
+            to that document (filename and saved_as only); invalid, unknown
+            or undeletable IDs are left out
+        """
+        given_ids: Dict[ObjectId, List[str]] = {}
+        for file_id in file_ids:
+            try:
+                object_id = _as_oid(file_id)
+            except (InvalidId, TypeError):
+                continue
+            given_ids.setdefault(object_id, []).append(file_id)
+        if not given_ids:
+            return {}
+        
+        files = list(self.collection.find(
+            {'_id': {'$in': list(given_ids)}},
+            projection={'filename': 1, 'saved_as': 1}
+        ))
+        if not files:
+            return {}
+        
+        try:
+            self.collection.bulk_write(
+                [DeleteOne({'_id': file['_id']}) for file in files],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Keep the documents that were removed; drop the ones whose
+            # delete failed so they are reported as failed by the caller
+            failed = set()
+            for error in e.details.get('writeErrors', []):
+                failed.add(error['index'])
+                logger.warning(
+                    "Could not delete file %s: %s",
+                    files[error['index']]['_id'], error.get('errmsg')
+                )
+            files = [file for index, file in enumerate(files) if index not in failed]
+        
+        deleted = {}
+        for file in files:
+            object_id = file['_id']
+            file['_id'] = str(object_id)
+            for file_id in given_ids[object_id]:
+                deleted[file_id] = file
+        return deleted
+    
     def update_status(
         self,
         file_id: str,
         status: str,
-        log_count: Optional[int] = None
+        log_count: Optional[int] = None,
+        metadata: Optional[Dict] = None
     ) -> bool:
         """
-        Update file status and optionally log count
+        Update file status and optionally log count and metadata
         
         Args:
             file_id: MongoDB ObjectId as string
             status: New status (pending, processing, completed, error)
             log_count: Optional log count to update
+            metadata: Optional metadata fields to set
         
         Returns:
             bool: True if updated, False otherwise
@@ -142,14 +252,17 @@ class File:
             if log_count is not None:
                 update_data['log_count'] = log_count
             
+            for key, value in (metadata or {}).items():
+                update_data[f'metadata.{key}'] = value
+            
             result = self.collection.update_one(
-                {'_id': ObjectId(file_id)},
+                {'_id': _as_oid(file_id)},
                 {'$set': update_data}
             )
             
             return result.modified_count > 0
         except Exception as e:
-            print(f"Error updating file {file_id}: {str(e)}")
+            logger.error("Error updating file %s: %s", file_id, e)
             return False
     
     def get_statistics(self) -> Dict:
@@ -187,7 +300,7 @@ class File:
                     'total_size': 0
                 }
         except Exception as e:
-            print(f"Error getting statistics: {str(e)}")
+            logger.error("Error getting statistics: %s", e)
             return {
                 'total_files': 0,
                 'total_logs': 0,
@@ -7,6 +7,12 @@ from typing import Dict, Optional
 import bcrypt
 
 
+# Read projections: the password hash is excluded server-side so it is never
+# sent or decoded, and existence checks only fetch the _id
+PUBLIC_PROJECTION = {'password_hash': 0}
+ID_PROJECTION = {'_id': 1}
+
+
 class User:
     """Model for user authentication stored in MongoDB"""
     
@@ -57,11 +63,11 @@ class User:
                 raise ValueError("Username, email, and password are required")
             
             # Check if username already exists
-            if self.collection.find_one({'username': username}):
+            if self.collection.find_one({'username': username}, ID_PROJECTION):
                 raise ValueError(f"Username '{username}' already exists")
             
             # Check if email already exists
-            if self.collection.find_one({'email': email}):
+            if self.collection.find_one({'email': email}, ID_PROJECTION):
                 raise ValueError(f"Email '{email}' already exists")
             
             # Hash password with bcrypt
@@ -151,13 +157,11 @@ class User:
             Dict: User document (without password_hash), or None if not found
         """
         try:
-            user = self.collection.find_one({'_id': ObjectId(user_id)})
+            user = self.collection.find_one({'_id': ObjectId(user_id)}, PUBLIC_PROJECTION)
             
             if not user:
                 return None
             
-            # Remove password hash
-            user.pop('password_hash', None)
             user['_id'] = str(user['_id'])
             
             return user
@@ -177,13 +181,11 @@ class User:
             Dict: User document (without password_hash), or None if not found
         """
         try:
-            user = self.collection.find_one({'username': username})
+            user = self.collection.find_one({'username': username}, PUBLIC_PROJECTION)
             
             if not user:
                 return None
             
-            # Remove password hash
-            user.pop('password_hash', None)
             user['_id'] = str(user['_id'])
             
             return user
@@ -203,13 +205,11 @@ class User:
             Dict: User document (without password_hash), or None if not found
         """
         try:
-            user = self.collection.find_one({'email': email})
+            user = self.collection.find_one({'email': email}, PUBLIC_PROJECTION)
             
             if not user:
                 return None
             
-            # Remove password hash
-            user.pop('password_hash', None)
             user['_id'] = str(user['_id'])
             
             return user
@@ -269,7 +269,7 @@ class User:
                 existing = self.collection.find_one({
                     'email': email,
                     '_id': {'$ne': ObjectId(user_id)}
-                })
+                }, ID_PROJECTION)
                 if existing:
                     raise ValueError(f"Email '{email}' is already taken")
                 update_fields['email'] = email
@@ -368,15 +368,14 @@ class User:
         """
         try:
             users = list(
-                self.collection.find()
+                self.collection.find({}, PUBLIC_PROJECTION)
                 .sort('created_at', -1)
                 .skip(skip)
                 .limit(limit)
             )
             
-            # Remove password hashes and convert ObjectId
+            # Convert ObjectId
             for user in users:
-                user.pop('password_hash', None)
                 user['_id'] = str(user['_id'])
             
             return users
@@ -0,0 +1,71 @@
+"""
+Shared pytest fixtures for the SaaS Monitoring Platform web app
+
+Run from the app directory:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Point every backend at a closed port so importing the app fails fast
+# instead of waiting on services that are not running
+os.environ.setdefault('ELASTICSEARCH_HOST', 'http://127.0.0.1:1')
+os.environ.setdefault('MONGODB_URI', 'mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200')
+os.environ.setdefault('REDIS_HOST', '127.0.0.1')
+os.environ.setdefault('REDIS_PORT', '1')
+
+
+class FakeElasticsearch:
+    """Elasticsearch stand-in that records calls and returns canned responses"""
+    
+    def __init__(self):
+        self.calls = []
+        self.search_response = {'hits': {'total': {'value': 0, 'relation': 'eq'}}}
+        self.count_response = {'count': 0}
+        self.error = None
+    
+    def _call(self, name, kwargs, response):
+        self.calls.append((name, kwargs))
+        if self.error:
+            raise self.error
+        return response
+    
+    def search(self, **kwargs):
+        return self._call('search', kwargs, self.search_response)
+    
+    def count(self, **kwargs):
+        return self._call('count', kwargs, self.count_response)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The app module, imported once with its log files in a temp directory"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    try:
+        import app as app_module
+    finally:
+        os.chdir(cwd)
+    return app_module
+
+
+@pytest.fixture
+def fake_es(app_module, monkeypatch):
+    """Replace the Elasticsearch client, and disable caching and history"""
+    es = FakeElasticsearch()
+    monkeypatch.setattr(app_module, 'es_client', es)
+    monkeypatch.setattr(app_module, 'redis_client', None)
+    monkeypatch.setattr(app_module, 'search_history_model', None)
+    monkeypatch.setattr(app_module.app, 'cache_manager', None)
+    return es
+
+
+@pytest.fixture
+def client(app_module, fake_es):
+    """Flask test client backed by the fake Elasticsearch client"""
+    return app_module.app.test_client()
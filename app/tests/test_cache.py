@@ -0,0 +1,174 @@
+"""
+Tests for the cache_result decorator and the cached /api/stats endpoint
+"""
+import pytest
+from flask import Flask, jsonify
+
+from utils.cache import INDEX_KEY_PREFIX, CacheManager, cache_result
+
+
+class FakeRedis:
+    """Redis stand-in keeping values in a dict, without expiry"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value).encode()
+        return True
+    
+    def setex(self, key, timeout, value):
+        self.data[key] = value
+        return True
+    
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+    
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+        return len(mapping)
+    
+    def zremrangebyscore(self, key, minimum, maximum):
+        return 0
+    
+    def expire(self, key, timeout, **kwargs):
+        return True
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+    
+    def expire_fresh_entries(self):
+        """Drop cached results as their TTL would, keeping stale copies and locks"""
+        for key in list(self.data):
+            if not key.startswith(INDEX_KEY_PREFIX) and not key.endswith((':stale', ':lock')):
+                del self.data[key]
+    
+    def cache_key(self):
+        """Key of the single result cached so far"""
+        [stale_key] = [key for key in self.data if key.endswith(':stale')]
+        return stale_key[:-len(':stale')]
+
+
+class FakePipeline:
+    """Queues FakeRedis commands and runs them on execute"""
+    
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+    
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class StatsSource:
+    """Canned stats for the cached test view, counting recomputations"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+    
+    def compute(self):
+        self.calls += 1
+        if self.error:
+            return jsonify({'error': self.error}), 503
+        return jsonify({'total_logs': self.calls})
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def source():
+    return StatsSource()
+
+
+@pytest.fixture
+def cache_client(redis, source):
+    """Client for an app whose /stats view is cached like /api/stats"""
+    app = Flask(__name__)
+    app.cache_manager = CacheManager(redis)
+    
+    @app.route('/stats')
+    @cache_result(timeout=15, key_prefix='stats', stale_timeout=300)
+    def get_stats():
+        return source.compute()
+    
+    return app.test_client()
+
+
+def test_fresh_hit_is_served_without_recomputing(cache_client, source):
+    first = cache_client.get('/stats')
+    second = cache_client.get('/stats')
+    
+    assert 'X-Cache' not in first.headers
+    assert second.status_code == 200
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json() == {'total_logs': 1}
+    assert source.calls == 1
+
+
+def test_stale_copy_is_served_when_recomputing_fails(cache_client, redis, source):
+    cache_client.get('/stats')
+    redis.expire_fresh_entries()
+    source.error = 'Elasticsearch unavailable'
+    
+    response = cache_client.get('/stats')
+    
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'STALE'
+    assert response.get_json() == {'total_logs': 1}
+    assert source.calls == 2
+
+
+def test_failure_without_stale_copy_is_not_cached(cache_client, redis, source):
+    source.error = 'Elasticsearch unavailable'
+    
+    response = cache_client.get('/stats')
+    
+    assert response.status_code == 503
+    assert 'X-Cache' not in response.headers
+    assert not redis.data
+    # The lock is released, so the next caller tries again
+    cache_client.get('/stats')
+    assert source.calls == 2
+
+
+def test_only_the_lock_holder_recomputes(cache_client, redis, source):
+    cache_client.get('/stats')
+    redis.expire_fresh_entries()
+    cache_key = redis.cache_key()
+    # Another worker is recomputing the expired entry
+    assert cache_client.application.cache_manager.acquire_lock(cache_key)
+    
+    responses = [cache_client.get('/stats') for _ in range(3)]
+    
+    assert [response.headers['X-Cache'] for response in responses] == ['STALE'] * 3
+    assert source.calls == 1
+    
+    cache_client.application.cache_manager.release_lock(cache_key)
+    response = cache_client.get('/stats')
+    
+    assert 'X-Cache' not in response.headers
+    assert response.get_json() == {'total_logs': 2}
+    assert source.calls == 2
+
+
+def test_stats_failure_hides_exception_text(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'es_client', None)
+    
+    response = client.get('/api/stats')
+    
+    assert response.status_code == 503
+    assert response.get_json()['error'] == 'An error occurred while fetching statistics'
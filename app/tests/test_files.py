@@ -0,0 +1,151 @@
+"""
+Tests for bulk file deletion
+"""
+import os
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from models.file import File
+
+
+class FakeFilesCollection:
+    """MongoDB files collection stand-in for the find + bulk_write delete path"""
+    
+    def __init__(self, *docs):
+        self.docs = {doc['_id']: doc for doc in docs}
+        self.calls = []
+        # IDs whose DeleteOne fails with a write error
+        self.failing_ids = set()
+        # IDs another request deletes between the find and the bulk write
+        self.deleted_elsewhere = set()
+    
+    def find(self, filter, projection=None):
+        self.calls.append('find')
+        ids = filter['_id']['$in']
+        return [
+            {'_id': doc_id, **{field: doc[field] for field in projection if field in doc}}
+            for doc_id, doc in self.docs.items() if doc_id in ids
+        ]
+    
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append('bulk_write')
+        assert ordered is False
+        write_errors = []
+        for index, operation in enumerate(requests):
+            doc_id = operation._filter['_id']
+            if doc_id in self.failing_ids:
+                write_errors.append({'index': index, 'code': 2, 'errmsg': 'delete failed'})
+            elif doc_id not in self.deleted_elsewhere:
+                del self.docs[doc_id]
+        if write_errors:
+            raise BulkWriteError({'writeErrors': write_errors})
+
+
+class ImmediateExecutor:
+    """Executor stand-in that runs submitted work on the calling thread"""
+    
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def file_doc(saved_as):
+    return {'_id': ObjectId(), 'filename': saved_as, 'saved_as': saved_as}
+
+
+@pytest.fixture
+def upload_dir(app_module, monkeypatch, tmp_path):
+    """Uploads folder in a temp directory, with removals run synchronously"""
+    monkeypatch.setattr(app_module, 'UPLOAD_PREFIX', str(tmp_path) + os.sep)
+    monkeypatch.setattr(app_module, '_file_remove_executor', ImmediateExecutor())
+    return tmp_path
+
+
+@pytest.fixture
+def files_collection(app_module, fake_es, monkeypatch, upload_dir):
+    """Fake files collection behind the app's File model"""
+    collection = FakeFilesCollection()
+    model = File({'saas_monitoring': {'files': collection}})
+    monkeypatch.setattr(app_module, 'file_model', model)
+    return collection
+
+
+def add_files(collection, upload_dir, *names):
+    docs = [file_doc(name) for name in names]
+    for doc in docs:
+        collection.docs[doc['_id']] = doc
+        (upload_dir / doc['saved_as']).write_text('data')
+    return docs
+
+
+def test_bulk_delete_uses_one_find_and_one_bulk_write(client, files_collection, upload_dir):
+    docs = add_files(files_collection, upload_dir, 'a.csv', 'b.csv', 'c.csv')
+    file_ids = [str(doc['_id']) for doc in docs]
+    
+    data = client.post('/api/files/bulk-delete', json={'file_ids': file_ids}).get_json()
+    
+    assert data['success'] is True
+    assert data['deleted'] == file_ids
+    assert files_collection.calls == ['find', 'bulk_write']
+    assert not files_collection.docs
+    assert not list(upload_dir.iterdir())
+
+
+def test_bulk_delete_partial_failure_keeps_deleted_files(client, files_collection, upload_dir):
+    kept, failing = add_files(files_collection, upload_dir, 'kept.csv', 'failing.csv')
+    files_collection.failing_ids.add(failing['_id'])
+    
+    response = client.post('/api/files/bulk-delete', json={
+        'file_ids': [str(kept['_id']), str(failing['_id']), 'not-an-id']
+    })
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['deleted'] == [str(kept['_id'])]
+    assert data['failed'] == [str(failing['_id']), 'not-an-id']
+    # Only the file whose document was deleted leaves the disk
+    assert [path.name for path in upload_dir.iterdir()] == ['failing.csv']
+    assert list(files_collection.docs) == [failing['_id']]
+
+
+def test_bulk_delete_reports_duplicate_and_uppercase_ids(client, files_collection, upload_dir):
+    [doc] = add_files(files_collection, upload_dir, 'a.csv')
+    file_id = str(doc['_id'])
+    file_ids = [file_id, file_id, file_id.upper()]
+    
+    data = client.post('/api/files/bulk-delete', json={'file_ids': file_ids}).get_json()
+    
+    # Every spelling the client sent is reported back as deleted
+    assert data['success'] is True
+    assert data['deleted'] == file_ids
+    assert data['failed'] == []
+    assert not list(upload_dir.iterdir())
+
+
+def test_bulk_delete_tolerates_concurrent_delete(client, files_collection, upload_dir):
+    [doc] = add_files(files_collection, upload_dir, 'a.csv')
+    # Another request removes the document and its file after our find
+    files_collection.deleted_elsewhere.add(doc['_id'])
+    (upload_dir / 'a.csv').unlink()
+    
+    response = client.post('/api/files/bulk-delete', json={'file_ids': [str(doc['_id'])]})
+    
+    assert response.status_code == 200
+    assert response.get_json()['deleted'] == [str(doc['_id'])]
+
+
+def test_pop_many_maps_given_ids_to_deleted_documents():
+    collection = FakeFilesCollection()
+    kept, failing = file_doc('kept.csv'), file_doc('failing.csv')
+    collection.docs = {kept['_id']: kept, failing['_id']: failing}
+    collection.failing_ids.add(failing['_id'])
+    kept_id = str(kept['_id'])
+    
+    popped = File({'saas_monitoring': {'files': collection}}).pop_many(
+        [kept_id, kept_id.upper(), str(failing['_id']), 'not-an-id']
+    )
+    
+    expected = {'_id': kept_id, 'filename': 'kept.csv', 'saved_as': 'kept.csv'}
+    assert popped == {kept_id: expected, kept_id.upper(): expected}
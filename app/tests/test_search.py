@@ -0,0 +1,114 @@
+"""
+Tests for the log search endpoints
+"""
+
+# Fields of a log returned by /api/search, as stored in Elasticsearch
+SEARCH_RESULT_FIELDS = {
+    '@timestamp', 'level', 'endpoint', 'status_code', 'response_time_ms',
+    'message', 'server', 'user_id', 'client_ip'
+}
+
+FULL_LOG = {
+    '@timestamp': '2025-10-30T10:00:00Z',
+    'level': 'ERROR',
+    'endpoint': '/api/upload',
+    'status_code': 500,
+    'response_time_ms': 1200,
+    'message': 'Database connection failed',
+    'server': 'server-01',
+    'user_id': 'user123',
+    'client_ip': '192.168.1.1'
+}
+
+PARTIAL_LOG = {
+    '@timestamp': '2025-10-30T09:00:00Z',
+    'level': 'INFO',
+    'message': 'Health check'
+}
+
+
+def search_response(*sources, total=None, relation='eq'):
+    """Elasticsearch search response, trimmed like the endpoint's filter_path"""
+    hits = {'total': {'value': len(sources) if total is None else total, 'relation': relation}}
+    if sources:
+        hits['hits'] = [{'_source': source} for source in sources]
+    return {'hits': hits}
+
+
+def test_search_results_are_log_sources(client, fake_es):
+    fake_es.search_response = search_response(FULL_LOG)
+    
+    response = client.post('/api/search', json={})
+    
+    assert response.status_code == 200
+    [result] = response.get_json()['results']
+    assert set(result) == SEARCH_RESULT_FIELDS
+    assert result == FULL_LOG
+    assert 'timestamp' not in result
+
+
+def test_search_omits_missing_fields(client, fake_es):
+    fake_es.search_response = search_response(FULL_LOG, PARTIAL_LOG)
+    
+    results = client.post('/api/search', json={}).get_json()['results']
+    
+    # Fields absent from a log are left out, not returned as null
+    assert results[1] == PARTIAL_LOG
+    assert 'server' not in results[1]
+
+
+def test_search_requests_only_returned_fields(client, fake_es):
+    client.post('/api/search', json={})
+    
+    [(name, kwargs)] = fake_es.calls
+    assert name == 'search'
+    assert set(kwargs['body']['_source']) == SEARCH_RESULT_FIELDS
+
+
+def test_search_pagination_envelope(client, fake_es):
+    fake_es.search_response = search_response(FULL_LOG, total=120, relation='gte')
+    
+    data = client.post('/api/search', json={'page': 2, 'per_page': 50}).get_json()
+    
+    assert data['total'] == 120
+    assert data['total_relation'] == 'gte'
+    assert data['page'] == 2
+    assert data['per_page'] == 50
+    assert data['total_pages'] == 3
+
+
+def test_search_without_matches(client, fake_es):
+    # filter_path drops hits.hits entirely when nothing matched
+    data = client.post('/api/search', json={'q': 'nothing'}).get_json()
+    
+    assert data['results'] == []
+    assert data['total'] == 0
+    assert data['total_pages'] == 0
+
+
+def test_search_count_returns_exact_total(client, fake_es):
+    fake_es.count_response = {'count': 254310}
+    
+    response = client.post('/api/search/count', json={'level': 'error', 'page': 3})
+    
+    assert response.status_code == 200
+    assert response.get_json() == {'total': 254310}
+
+
+def test_search_count_uses_search_filters(client, fake_es, app_module):
+    filters = {'q': 'timeout', 'level': 'ERROR', 'status_code': '5XX', 'page': 4, 'per_page': 10}
+    
+    client.post('/api/search/count', json=filters)
+    
+    [(name, kwargs)] = fake_es.calls
+    assert name == 'count'
+    assert kwargs['body'] == {'query': app_module.build_search_query(filters)}
+
+
+def test_search_count_error(client, fake_es):
+    fake_es.error = ConnectionError('cluster unreachable')
+    
+    response = client.post('/api/search/count', json={})
+    
+    assert response.status_code == 500
+    assert 'cluster unreachable' not in response.get_json()['error']
@@ -1,13 +1,20 @@
 """
 Redis caching utilities for the SaaS Monitoring Platform
 """
-import json
 import hashlib
 import functools
-from typing import Any, Optional, Callable
+import time
+from typing import Any, Optional, Callable, List
+import msgpack
+import orjson
 from flask import request
 
 
+# Redis sorted set per namespace holding the keys cached under it, each
+# scored by the time its entry expires
+INDEX_KEY_PREFIX = "cache:keys:"
+
+
 class CacheManager:
     """Manager for Redis caching operations"""
     
@@ -34,6 +41,26 @@ class CacheManager:
         Returns:
             Cached value or None if not found
         """
+        value = self.get_raw(key)
+        if value is None:
+            return None
+        
+        try:
+            return msgpack.unpackb(value, raw=False)
+        except Exception as e:
+            print(f"Cache get error: {str(e)}")
+            return None
+    
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Get stored bytes from cache, without deserializing them
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            bytes: Cached bytes or None if not found
+        """
         if not self.redis:
             return None
         
@@ -41,7 +68,7 @@ class CacheManager:
             value = self.redis.get(key)
             if value:
                 self.stats['hits'] += 1
-                return json.loads(value)
+                return value
             else:
                 self.stats['misses'] += 1
                 return None
@@ -56,7 +83,27 @@ class CacheManager:
         
         Args:
             key: Cache key
-            value: Value to cache (will be JSON serialized)
+            value: Value to cache (will be msgpack serialized)
+            timeout: TTL in seconds (default: 300)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            serialized = msgpack.packb(value, use_bin_type=True)
+        except Exception as e:
+            print(f"Cache set error: {str(e)}")
+            return False
+        
+        return self.set_raw(key, serialized, timeout)
+    
+    def set_raw(self, key: str, value: bytes, timeout: int = 300) -> bool:
+        """
+        Store bytes in cache as-is, with timeout
+        
+        Args:
+            key: Cache key
+            value: Already serialized value
             timeout: TTL in seconds (default: 300)
         
         Returns:
@@ -66,8 +113,19 @@ class CacheManager:
             return False
         
         try:
-            serialized = json.dumps(value)
-            self.redis.setex(key, timeout, serialized)
+            namespace = key.split(':', 1)[0]
+            index_key = f"{INDEX_KEY_PREFIX}{namespace}"
+            now = time.time()
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(key, timeout, value)
+            # Track the key under its namespace so invalidation needs no SCAN,
+            # and prune entries that have expired since, so the index only
+            # holds live keys. It lives as long as its longest-lived key.
+            pipe.zadd(index_key, {key: now + timeout})
+            pipe.zremrangebyscore(index_key, '-inf', now)
+            pipe.expire(index_key, timeout, nx=True)
+            pipe.expire(index_key, timeout, gt=True)
+            pipe.execute()
             return True
         except Exception as e:
             print(f"Cache set error: {str(e)}")
@@ -93,12 +151,46 @@ class CacheManager:
             print(f"Cache delete error: {str(e)}")
             return False
     
-    def clear_pattern(self, pattern: str) -> int:
+    def acquire_lock(self, key: str, timeout: int = 5) -> bool:
+        """
+        Acquire a short-lived lock for recomputing a cache entry
+        
+        Args:
+            key: Cache key the lock protects
+            timeout: Lock TTL in seconds (default: 5)
+        
+        Returns:
+            bool: True if the lock was acquired (or Redis is unavailable), False if held elsewhere
+        """
+        if not self.redis:
+            return True
+        
+        try:
+            return bool(self.redis.set(f"{key}:lock", 1, nx=True, ex=timeout))
+        except Exception as e:
+            print(f"Cache lock error: {str(e)}")
+            return True
+    
+    def release_lock(self, key: str) -> None:
+        """
+        Release a lock taken with acquire_lock
+        
+        Args:
+            key: Cache key the lock protects
+        """
+        self.delete(f"{key}:lock")
+    
+    def clear_namespaces(self, namespaces: List[str]) -> int:
         """
-        Clear all keys matching pattern
+        Clear every key cached under several namespaces
+        
+        Uses the per-namespace key index maintained by ``set``, so only the
+        tracked keys that have not expired yet are touched instead of
+        scanning the keyspace. Each index is read and dropped atomically;
+        keys cached afterwards start a new one.
         
         Args:
-            pattern: Pattern to match (e.g., "search:*")
+            namespaces: Key prefixes before the first ":" (e.g., ["files"])
         
         Returns:
             int: Number of keys deleted
@@ -107,13 +199,18 @@ class CacheManager:
             return 0
         
         try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                self.redis.delete(*keys)
-                return len(keys)
-            return 0
+            now = time.time()
+            pipe = self.redis.pipeline(transaction=True)
+            for namespace in namespaces:
+                index_key = f"{INDEX_KEY_PREFIX}{namespace}"
+                pipe.zrangebyscore(index_key, now, '+inf')
+                pipe.delete(index_key)
+            keys = set().union(*pipe.execute()[::2])
+            if not keys:
+                return 0
+            return self.redis.delete(*keys)
         except Exception as e:
-            print(f"Cache clear pattern error: {str(e)}")
+            print(f"Cache clear namespace error: {str(e)}")
             return 0
     
     def get_stats(self) -> dict:
@@ -141,13 +238,20 @@ class CacheManager:
         }
 
 
-def cache_result(timeout: int = 300, key_prefix: str = "cache"):
+def cache_result(timeout: int = 300, key_prefix: str = "cache", stale_timeout: Optional[int] = None,
+                 key_func: Optional[Callable[[], Any]] = None):
     """
     Decorator to cache function results in Redis
     
     Args:
         timeout: TTL in seconds (default: 300)
         key_prefix: Prefix for cache key (default: "cache")
+        stale_timeout: If set, keep a copy of the last result for this many
+            seconds. When the fresh entry expires only one caller recomputes it
+            while concurrent callers are served the stale copy.
+        key_func: Optional callable returning the data that identifies the
+            result. Defaults to the request method, path, query args and
+            JSON body; a normalized key lets equivalent requests share entries.
     
     Usage:
         @cache_result(timeout=60, key_prefix="stats")
@@ -158,7 +262,7 @@ def cache_result(timeout: int = 300, key_prefix: str = "cache"):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Get cache manager from app context
-            from flask import current_app, jsonify
+            from flask import current_app
             cache_manager = getattr(current_app, 'cache_manager', None)
             
             if not cache_manager:
@@ -166,36 +270,53 @@ def cache_result(timeout: int = 300, key_prefix: str = "cache"):
                 return func(*args, **kwargs)
             
             # Generate cache key based on function name and arguments
-            cache_key = _generate_cache_key(key_prefix, func.__name__, args, kwargs)
+            if key_func is not None:
+                cache_key = _hash_cache_key(key_prefix, func.__name__, key_func())
+            else:
+                cache_key = _generate_cache_key(key_prefix, func.__name__, args, kwargs)
             
-            # Try to get from cache
-            cached_value = cache_manager.get(cache_key)
-            if cached_value is not None:
+            # Try to get from cache; the stored body is sent back as-is
+            cached_body = cache_manager.get_raw(cache_key)
+            if cached_body is not None:
                 print(f"Cache HIT: {cache_key}")
-                # Return the cached data wrapped in jsonify
-                return jsonify(cached_value)
+                return _cached_response(cached_body, 'HIT')
+            
+            stale_key = f"{cache_key}:stale"
+            locked = False
+            if stale_timeout:
+                # Only the lock winner recomputes; everyone else gets the stale copy
+                locked = cache_manager.acquire_lock(cache_key)
+                if not locked:
+                    stale_body = cache_manager.get_raw(stale_key)
+                    if stale_body is not None:
+                        print(f"Cache STALE: {cache_key}")
+                        return _cached_response(stale_body, 'STALE')
             
             # Cache miss - call function
             print(f"Cache MISS: {cache_key}")
-            result = func(*args, **kwargs)
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                if locked:
+                    cache_manager.release_lock(cache_key)
+                raise
             
-            # Extract data from Flask Response if needed
-            if hasattr(result, 'get_json'):
-                # It's a Flask Response, extract the JSON data
-                data_to_cache = result.get_json()
-                cache_manager.set(cache_key, data_to_cache, timeout)
-            elif isinstance(result, tuple):
-                # Handle (response, status_code) tuples
-                response_obj = result[0]
-                if hasattr(response_obj, 'get_json'):
-                    data_to_cache = response_obj.get_json()
-                    cache_manager.set(cache_key, data_to_cache, timeout)
-            else:
-                # Try to cache as-is (should be a dict)
-                try:
-                    cache_manager.set(cache_key, result, timeout)
-                except:
+            body = _response_body(result)
+            
+            if body is not None:
+                if not cache_manager.set_raw(cache_key, body, timeout):
                     print(f"Warning: Could not cache result for {cache_key}")
+                elif stale_timeout:
+                    cache_manager.set_raw(stale_key, body, stale_timeout)
+            elif stale_timeout:
+                # Recomputing failed: the last good result beats an error
+                stale_body = cache_manager.get_raw(stale_key)
+                if stale_body is not None:
+                    print(f"Cache STALE (fallback): {cache_key}")
+                    result = _cached_response(stale_body, 'STALE')
+            
+            if locked:
+                cache_manager.release_lock(cache_key)
             
             return result
         
@@ -203,6 +324,53 @@ def cache_result(timeout: int = 300, key_prefix: str = "cache"):
     return decorator
 
 
+def _response_body(result: Any) -> Optional[bytes]:
+    """
+    Get the JSON body to cache from a view result
+    
+    Args:
+        result: Flask Response, (response, status_code) tuple, or dict
+    
+    Returns:
+        bytes: Serialized JSON body, or None if the result should not be
+        cached (error responses, since hits are always replayed as 200)
+    """
+    from flask import current_app
+    
+    if isinstance(result, tuple):
+        response_obj = result[0]
+        status_code = result[1] if len(result) > 1 and isinstance(result[1], int) else 200
+    else:
+        response_obj = result
+        status_code = getattr(result, 'status_code', 200)
+    
+    if status_code >= 300:
+        return None
+    if hasattr(response_obj, 'get_data'):
+        return response_obj.get_data() if response_obj.is_json else None
+    if isinstance(response_obj, dict):
+        return current_app.json.dumps(response_obj).encode('utf-8')
+    return None
+
+
+def _cached_response(body: bytes, state: str):
+    """
+    Build a JSON response around a cached body
+    
+    Args:
+        body: Serialized JSON body
+        state: Value of the X-Cache header (HIT or STALE)
+    
+    Returns:
+        Response: JSON response with status 200
+    """
+    from flask import current_app
+    
+    response = current_app.response_class(body, mimetype='application/json')
+    response.headers['X-Cache'] = state
+    return response
+
+
 def _generate_cache_key(prefix: str, func_name: str, args: tuple, kwargs: dict) -> str:
     """
     Generate cache key from function name and arguments
@@ -246,9 +414,27 @@ def _generate_cache_key(prefix: str, func_name: str, args: tuple, kwargs: dict)
             'kwargs': kwargs
         }
     
-    # Create hash of key data
-    key_string = json.dumps(key_data, sort_keys=True, default=str)
-    key_hash = hashlib.md5(key_string.encode()).hexdigest()
+    return _hash_cache_key(prefix, func_name, key_data)
+
+
+def _hash_cache_key(prefix: str, func_name: str, key_data: Any) -> str:
+    """
+    Build a cache key from a hash of the identifying data
+    
+    Args:
+        prefix: Key prefix
+        func_name: Function name
+        key_data: JSON-serializable data identifying the result
+    
+    Returns:
+        str: Cache key
+    """
+    key_bytes = orjson.dumps(
+        key_data,
+        default=str,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    )
+    key_hash = hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
     
     return f"{prefix}:{func_name}:{key_hash}"
 
@@ -263,13 +449,25 @@ def invalidate_cache(key_prefix: str):
     Usage:
         invalidate_cache("files")  # Clears all "files:*" keys
     """
+    return invalidate_many([key_prefix])
+
+
+def invalidate_many(key_prefixes: List[str]):
+    """
+    Invalidate all cache keys under several prefixes at once
+    
+    Args:
+        key_prefixes: Prefixes to match (e.g., ["files", "uploads"])
+    
+    Usage:
+        invalidate_many(["files", "uploads"])  # Clears "files:*" and "uploads:*"
+    """
     from flask import current_app
     cache_manager = getattr(current_app, 'cache_manager', None)
     
     if cache_manager:
-        pattern = f"{key_prefix}:*"
-        deleted = cache_manager.clear_pattern(pattern)
-        print(f"Invalidated {deleted} cache keys with pattern: {pattern}")
+        deleted = cache_manager.clear_namespaces(key_prefixes)
+        print(f"Invalidated {deleted} cache keys under: {', '.join(key_prefixes)}")
         return deleted
     
     return 0
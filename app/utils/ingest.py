@@ -0,0 +1,173 @@
+"""
+Log ingestion utilities for uploaded files.
+
+This module provides:
+- Parsing of uploaded CSV/JSON log files into Elasticsearch documents
+- Bulk indexing of those documents with the parallel Bulk API
+"""
+
+import csv
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Tuple
+
+import orjson
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import parallel_bulk
+
+try:
+    import ijson
+except ImportError:  # Optional: large JSON uploads are then loaded whole
+    ijson = None
+
+
+# Same daily index pattern the Logstash pipeline writes to
+INDEX_PREFIX = 'saas-logs-'
+
+# Bulk request sizing
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # 10MB
+BULK_THREAD_COUNT = 4
+BULK_QUEUE_SIZE = 4  # Chunks buffered ahead of the bulk threads
+
+# JSON arrays above this size are streamed item by item (needs ijson)
+JSON_STREAM_MIN_BYTES = 10 * 1024 * 1024  # 10MB
+
+
+def to_log_document(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a parsed log row into an Elasticsearch bulk action.
+
+    Mirrors the Logstash filter: ``timestamp`` becomes ``@timestamp`` and
+    numeric fields are converted. The target index is picked from the
+    log's date.
+
+    Args:
+        row (Dict[str, Any]): Log entry as read from the file
+
+    Returns:
+        Dict[str, Any]: Bulk action with ``_index`` and ``_source``
+    """
+    source = {key: value for key, value in row.items() if key and value not in (None, '')}
+
+    timestamp = source.pop('timestamp', None) or source.get('@timestamp')
+    try:
+        log_date = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        log_date = None
+    if log_date is None:
+        log_date = datetime.utcnow()
+        timestamp = log_date.isoformat() + 'Z'
+    source['@timestamp'] = timestamp
+
+    for field, convert in (('status_code', int), ('response_time_ms', float)):
+        if field in source:
+            try:
+                source[field] = convert(source[field])
+            except (TypeError, ValueError):
+                del source[field]
+
+    return {
+        '_index': f"{INDEX_PREFIX}{log_date.strftime('%Y.%m.%d')}",
+        '_source': source
+    }
+
+
+def iter_json_entries(file_path: str) -> Iterator[Any]:
+    """
+    Yield the entries of a JSON upload.
+
+    A file may hold a list of log objects or a single object. Lists larger
+    than JSON_STREAM_MIN_BYTES are parsed incrementally with ijson when it
+    is installed, so memory stays flat; smaller files are parsed in one go
+    with orjson.
+
+    Args:
+        file_path (str): Path of the saved upload
+
+    Yields:
+        Any: Each list entry, or the single top-level value
+    """
+    with open(file_path, 'rb') as f:
+        if ijson is not None and os.fstat(f.fileno()).st_size > JSON_STREAM_MIN_BYTES:
+            head = f.read(64).lstrip()
+            f.seek(0)
+            if head.startswith(b'['):
+                yield from ijson.items(f, 'item', use_float=True)
+                return
+        data = orjson.loads(f.read())
+    yield from data if isinstance(data, list) else [data]
+
+
+def count_log_entries(file_path: str) -> int:
+    """
+    Count the entries of a JSON upload without keeping them around.
+
+    Args:
+        file_path (str): Path of the saved upload
+
+    Returns:
+        int: Number of log entries in the file
+    """
+    return sum(1 for _ in iter_json_entries(file_path))
+
+
+def iter_log_actions(file_path: str, file_type: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield bulk actions for every log entry in an uploaded file.
+
+    CSV files are read row by row; JSON files may hold a list of log
+    objects or a single object.
+
+    Args:
+        file_path (str): Path of the saved upload
+        file_type (str): File extension (csv or json)
+
+    Yields:
+        Dict[str, Any]: Bulk action per log entry
+    """
+    if file_type == 'csv':
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield to_log_document(row)
+    elif file_type == 'json':
+        for entry in iter_json_entries(file_path):
+            if isinstance(entry, dict):
+                yield to_log_document(entry)
+
+
+def index_log_file(es_client: Elasticsearch, file_path: str, file_type: str) -> Tuple[int, int]:
+    """
+    Index every log entry of an uploaded file into Elasticsearch.
+
+    Documents are sent in chunks of BULK_CHUNK_SIZE instead of one request
+    per log, with up to BULK_THREAD_COUNT bulk requests in flight. The
+    file is still read lazily; at most BULK_QUEUE_SIZE chunks are buffered.
+
+    Args:
+        es_client (Elasticsearch): Elasticsearch client
+        file_path (str): Path of the saved upload
+        file_type (str): File extension (csv or json)
+
+    Returns:
+        Tuple[int, int]: Number of documents indexed and number that failed
+    """
+    indexed = 0
+    failed = 0
+
+    for ok, _ in parallel_bulk(
+        es_client,
+        iter_log_actions(file_path, file_type),
+        thread_count=BULK_THREAD_COUNT,
+        queue_size=BULK_QUEUE_SIZE,
+        chunk_size=BULK_CHUNK_SIZE,
+        max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+        raise_on_error=False,
+        request_timeout=60
+    ):
+        if ok:
+            indexed += 1
+        else:
+            failed += 1
+
+    return indexed, failed
@@ -9,16 +9,23 @@ This module provides:
 - Query caching with TTL
 """
 
+import os
 import time
 import gzip
 import json
 import functools
+import importlib.util
+import threading
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, Iterator, List, Optional, Callable
 from flask import request, current_app
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import redis
 from pymongo import MongoClient
 from elasticsearch import Elasticsearch
+from elasticsearch.exceptions import SerializationError
+from elasticsearch.serializer import JsonSerializer, NdjsonSerializer
 
 
 # Global connection pools
@@ -26,6 +33,144 @@ _es_pool = None
 _mongo_pool = None
 _redis_pool = None
 
+# Pool sizing (per process); raise with the number of serving threads
+ES_POOL_SIZE = int(os.getenv('ES_POOL_SIZE', 50))
+MONGO_MAX_POOL = int(os.getenv('MONGO_MAX_POOL', 50))
+MONGO_MIN_POOL = int(os.getenv('MONGO_MIN_POOL', 10))
+REDIS_POOL_SIZE = int(os.getenv('REDIS_POOL_SIZE', 50))
+REDIS_POOL_TIMEOUT = int(os.getenv('REDIS_POOL_TIMEOUT', 5))  # seconds to wait for a free connection
+
+# TLS for https:// Elasticsearch URLs
+ES_TLS_FINGERPRINT = os.getenv('ES_TLS_FINGERPRINT')  # SHA-256 of the server certificate
+ES_CA_CERTS = os.getenv('ES_CA_CERTS')  # CA bundle path
+
+
+def es_tls_options() -> Dict[str, Any]:
+    """
+    TLS keyword arguments for the Elasticsearch client.
+    
+    A pinned certificate fingerprint is checked with a single SHA-256
+    compare per new connection instead of a full chain validation, so it
+    wins over a CA bundle when both are set. Without either, the system
+    trust store is used.
+    
+    Returns:
+        Keyword arguments for Elasticsearch()
+    """
+    if ES_TLS_FINGERPRINT:
+        return {'ssl_assert_fingerprint': ES_TLS_FINGERPRINT}
+    if ES_CA_CERTS:
+        return {'ca_certs': ES_CA_CERTS}
+    return {}
+
+
+def mongo_compressors() -> str:
+    """
+    Wire compressors to offer MongoDB, best first.
+    
+    zstd and snappy need optional packages, so they are only offered when
+    installed; zlib is always available.
+    
+    Returns:
+        Comma-separated compressor list for MongoClient
+    """
+    compressors = [
+        name for name, module in (('zstd', 'zstandard'), ('snappy', 'snappy'))
+        if importlib.util.find_spec(module) is not None
+    ]
+    compressors.append('zlib')
+    return ','.join(compressors)
+
+
+class OrjsonSerializer(JsonSerializer):
+    """Elasticsearch request/response JSON serializer backed by orjson."""
+    
+    def loads(self, data: bytes) -> Any:
+        # Some responses carry a JSON content type but no body
+        if data == b'':
+            return None
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(f"Unable to deserialize as JSON: {data!r}") from e
+    
+    def dumps(self, data: Any) -> bytes:
+        # Bodies that are already encoded are sent as-is
+        if isinstance(data, str):
+            return data.encode('utf-8', 'surrogatepass')
+        if isinstance(data, bytes):
+            return data
+        try:
+            return orjson.dumps(data, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError as e:
+            raise SerializationError(f"Unable to serialize to JSON: {data!r}") from e
+
+
+class OrjsonNdjsonSerializer(NdjsonSerializer):
+    """Elasticsearch NDJSON (bulk/msearch) serializer backed by orjson."""
+    
+    def loads(self, data: bytes) -> Any:
+        try:
+            return [orjson.loads(line) for line in data.splitlines() if line.strip()]
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(f"Unable to deserialize as NDJSON: {data!r}") from e
+    
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, (str, bytes)):
+            data = (data,)
+        
+        buffer = bytearray()
+        for line in data:
+            if isinstance(line, str):
+                line = line.encode('utf-8', 'surrogatepass')
+            elif not isinstance(line, bytes):
+                try:
+                    line = orjson.dumps(line, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+                except orjson.JSONEncodeError as e:
+                    raise SerializationError(f"Unable to serialize to NDJSON: {line!r}") from e
+            buffer += line
+            if not line.endswith(b'\n'):
+                buffer += b'\n'
+        return bytes(buffer)
+
+
+# Elasticsearch serializers by mimetype (compatibility mimetypes follow these)
+ES_SERIALIZERS = {
+    OrjsonSerializer.mimetype: OrjsonSerializer(),
+    OrjsonNdjsonSerializer.mimetype: OrjsonNdjsonSerializer()
+}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    
+    Output matches Flask's default provider (sorted keys, HTTP-date
+    datetimes) but is encoded straight to bytes.
+    """
+    
+    def _options(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._options()
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option) + b'\n',
+            mimetype=self.mimetype
+        )
+
 
 class ConnectionPool:
     """Manages connection pools for external services."""
@@ -34,6 +179,7 @@ class ConnectionPool:
         self.es_client = None
         self.mongo_client = None
         self.redis_client = None
+        self.redis_pool = None
         self._initialized = False
     
     def initialize(self, es_url: str, mongo_uri: str, redis_host: str, redis_port: int):
@@ -49,35 +195,49 @@ class ConnectionPool:
         if self._initialized:
             return
         
-        # Elasticsearch with connection pooling
+        # Elasticsearch with connection pooling (keep-alive connections are
+        # reused across requests; responses are gzip-compressed on the wire)
         self.es_client = Elasticsearch(
             [es_url],
-            maxsize=25,  # Max connections in pool
-            timeout=30,
-            max_retries=3,
-            retry_on_timeout=True
+            connections_per_node=ES_POOL_SIZE,  # Max pooled keep-alive connections per node
+            request_timeout=30,
+            http_compress=True,
+            max_retries=2,
+            retry_on_timeout=True,
+            serializers=ES_SERIALIZERS,
+            **es_tls_options()
         )
         
         # MongoDB with connection pooling
         self.mongo_client = MongoClient(
             mongo_uri,
-            maxPoolSize=50,  # Max connections
-            minPoolSize=10,  # Min connections
+            maxPoolSize=MONGO_MAX_POOL,  # Max connections
+            minPoolSize=MONGO_MIN_POOL,  # Min connections, opened up front
             maxIdleTimeMS=60000,  # 60 seconds
             waitQueueTimeoutMS=5000,  # 5 seconds
-            serverSelectionTimeoutMS=5000
+            serverSelectionTimeoutMS=2000,  # Fail fast so health probes stay bounded
+            connectTimeoutMS=2000,
+            compressors=mongo_compressors(),
+            retryWrites=True,
+            retryReads=True,
+            appname='saas-monitoring'
         )
         
-        # Redis connection pool
-        self.redis_client = redis.Redis(
+        # Redis connection pool, shared explicitly by every client built on it.
+        # Blocking: when all connections are busy callers wait for one to be
+        # released instead of failing, so the socket count stays bounded
+        self.redis_pool = redis.BlockingConnectionPool(
             host=redis_host,
             port=redis_port,
-            decode_responses=True,
-            max_connections=50,
+            decode_responses=False,  # Cache payloads are msgpack bytes
+            max_connections=REDIS_POOL_SIZE,
+            timeout=REDIS_POOL_TIMEOUT,
             socket_timeout=5,
             socket_connect_timeout=5,
+            socket_keepalive=True,
             health_check_interval=30
         )
+        self.redis_client = redis.Redis(connection_pool=self.redis_pool)
         
         self._initialized = True
     
@@ -107,6 +267,8 @@ class ConnectionPool:
             self.mongo_client.close()
         if self.redis_client:
             self.redis_client.close()
+        if self.redis_pool:
+            self.redis_pool.disconnect()
         self._initialized = False
 
 
@@ -129,6 +291,56 @@ def get_redis_client() -> redis.Redis:
     return connection_pool.get_redis_client()
 
 
+class LazyProxy:
+    """
+    Stand-in for an object that is only built on first use.
+    
+    The factory runs once, under a lock, the first time an attribute is
+    accessed or the proxy is truth-tested. A factory returning None makes
+    the proxy falsy, so existing ``if not model:`` checks keep working.
+    """
+    
+    __slots__ = ('_factory', '_lock', '_target', '_resolved')
+    
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        Initialize lazy proxy.
+        
+        Args:
+            factory: Callable building the target object
+        """
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_resolved', False)
+    
+    def _resolve(self) -> Any:
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    object.__setattr__(self, '_target', self._factory())
+                    object.__setattr__(self, '_resolved', True)
+        return self._target
+    
+    def reset(self):
+        """Drop the built object so the next use runs the factory again."""
+        with self._lock:
+            object.__setattr__(self, '_target', None)
+            object.__setattr__(self, '_resolved', False)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+    
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve()[key]
+    
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+    
+    def __bool__(self) -> bool:
+        return bool(self._resolve())
+
+
 class QueryCache:
     """Cache for Elasticsearch query results with TTL."""
     
@@ -159,7 +371,7 @@ class QueryCache:
             if cached:
                 return json.loads(cached)
         except Exception as e:
-            current_app.logger.error(f"Cache get error: {e}")
+            current_app.logger.error("Cache get error: %s", e)
         return None
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
@@ -179,14 +391,14 @@ class QueryCache:
                 json.dumps(value, default=str)
             )
         except Exception as e:
-            current_app.logger.error(f"Cache set error: {e}")
+            current_app.logger.error("Cache set error: %s", e)
     
     def delete(self, key: str):
         """Delete cached query result."""
         try:
             self.redis.delete(f"{self.cache_prefix}{key}")
         except Exception as e:
-            current_app.logger.error(f"Cache delete error: {e}")
+            current_app.logger.error("Cache delete error: %s", e)
     
     def clear_all(self):
         """Clear all cached queries."""
@@ -195,7 +407,7 @@ class QueryCache:
             if keys:
                 self.redis.delete(*keys)
         except Exception as e:
-            current_app.logger.error(f"Cache clear error: {e}")
+            current_app.logger.error("Cache clear error: %s", e)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -212,7 +424,7 @@ class QueryCache:
                 )
             }
         except Exception as e:
-            current_app.logger.error(f"Cache stats error: {e}")
+            current_app.logger.error("Cache stats error: %s", e)
             return {'error': str(e)}
     
     @staticmethod
@@ -250,11 +462,11 @@ def cache_query(ttl: int = 300, key_func: Optional[Callable] = None):
             cached_result = cache.get(cache_key)
             
             if cached_result is not None:
-                current_app.logger.debug(f"Cache HIT: {cache_key}")
+                current_app.logger.debug("Cache HIT: %s", cache_key)
                 return cached_result
             
             # Cache miss - execute function
-            current_app.logger.debug(f"Cache MISS: {cache_key}")
+            current_app.logger.debug("Cache MISS: %s", cache_key)
             result = func(*args, **kwargs)
             
             # Store in cache
@@ -395,6 +607,57 @@ class ESQueryOptimizer:
             pass
         
         return results
+    
+    @staticmethod
+    def pit_search(es_client: Elasticsearch, index: str, query: Dict,
+                   keep_alive: str = '2m', size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Page through a large result set with a point-in-time and search_after.
+        
+        Unlike scroll_query, pages are yielded as they arrive so callers can
+        process them without holding the whole result set in memory.
+        
+        Args:
+            es_client: Elasticsearch client
+            index: Index name
+            query: Query dict (its sort is extended with a _shard_doc tiebreaker)
+            keep_alive: Point-in-time keep alive (e.g., '2m')
+            size: Batch size
+            
+        Yields:
+            Lists of hits, one per batch
+        """
+        pit_id = es_client.open_point_in_time(index=index, keep_alive=keep_alive)['id']
+        
+        try:
+            body = dict(query)
+            body['size'] = size
+            body['sort'] = list(body.get('sort', [])) + [{'_shard_doc': 'asc'}]
+            body['track_total_hits'] = False
+            
+            while True:
+                body['pit'] = {'id': pit_id, 'keep_alive': keep_alive}
+                # Only the documents and their sort values are needed
+                response = es_client.search(
+                    body=body,
+                    filter_path=['pit_id', 'hits.hits._source', 'hits.hits.sort']
+                )
+                pit_id = response.get('pit_id', pit_id)
+                hits = response.get('hits', {}).get('hits', [])
+                if not hits:
+                    break
+                
+                yield hits
+                
+                if len(hits) < size:
+                    break
+                body['search_after'] = hits[-1]['sort']
+        finally:
+            # Release the point-in-time
+            try:
+                es_client.close_point_in_time(id=pit_id)
+            except:
+                pass
 
 
 class LazyDashboardStats:
@@ -517,7 +780,7 @@ class PerformanceMonitor:
             # Set expiry on the key
             self.redis.expire(key, self.window_size * 2)
         except Exception as e:
-            current_app.logger.error(f"Error recording metric: {e}")
+            current_app.logger.error("Error recording metric: %s", e)
     
     def get_average_time(self, metric_prefix: str) -> Dict[str, float]:
         """
@@ -535,16 +798,16 @@ class PerformanceMonitor:
             
             results = {}
             for key in keys:
-                metric_name = key.replace(self.metrics_prefix, '')
+                metric_name = key.decode('utf-8').replace(self.metrics_prefix, '')
                 values = self.redis.zrange(key, 0, -1)
                 
                 if values:
-                    times = [float(v.split(':')[1]) for v in values]
+                    times = [float(v.split(b':')[1]) for v in values]
                     results[metric_name] = round(sum(times) / len(times), 2)
             
             return results
         except Exception as e:
-            current_app.logger.error(f"Error getting average time: {e}")
+            current_app.logger.error("Error getting average time: %s", e)
             return {}
     
     def get_all_metrics(self) -> Dict[str, Any]:
@@ -592,10 +855,10 @@ def measure_time(metric_name: str, metric_type: str = 'api'):
                         monitor.record_mongo_query_time(metric_name, duration)
                     
                     current_app.logger.info(
-                        f"{metric_type.upper()} {metric_name}: {duration:.2f}ms"
+                        "%s %s: %.2fms", metric_type.upper(), metric_name, duration
                     )
                 except Exception as e:
-                    current_app.logger.error(f"Error recording time metric: {e}")
+                    current_app.logger.error("Error recording time metric: %s", e)
         
         return wrapper
     return decorator
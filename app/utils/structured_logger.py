@@ -3,10 +3,13 @@ Structured JSON logging with trace ID propagation.
 Provides consistent log format for observability and log analysis.
 """
 import logging
-import json
+import orjson
 import uuid
+import queue
+import atexit
 import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
 
 # Thread-local storage for trace context
@@ -72,7 +75,7 @@ class StructuredJsonFormatter(logging.Formatter):
             'function': record.funcName
         }
         
-        return json.dumps(log_entry, default=str)
+        return orjson.dumps(log_entry, default=str).decode('utf-8')
 
 
 class ContextLogger(logging.LoggerAdapter):
@@ -144,3 +147,40 @@ def log_with_context(logger: logging.Logger, level: int, message: str,
     extra = kwargs.pop('extra', {})
     extra['context'] = context or {}
     logger.log(level, message, extra=extra, **kwargs)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the listener thread.
+    
+    The stock QueueHandler formats the message (and any traceback) in the
+    calling thread so records can be pickled; records here never leave the
+    process, so the caller only pays for building the LogRecord.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_queue_logging(app_logger: logging.Logger, *handlers: logging.Handler) -> QueueListener:
+    """
+    Emit the application logger's records from a background thread.
+    
+    The given handlers (file, console, ...) are driven by a QueueListener,
+    so formatting and I/O happen off the request threads. The listener is
+    flushed and stopped at interpreter exit.
+    
+    Args:
+        app_logger: The application logger to configure
+        *handlers: Handlers that should receive the records
+        
+    Returns:
+        The started QueueListener
+    """
+    log_queue = queue.SimpleQueue()
+    app_logger.addHandler(DeferredQueueHandler(log_queue))
+    
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener